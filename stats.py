@@ -7,35 +7,69 @@
 """
 
 import argparse
+import asyncio
+import bisect
+import hashlib
+import io
 import os
 import re
 import subprocess
 import sys
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
+# 源码目录项: (名称, 路径, 是否为目录)
+SourceEntry = Tuple[str, str, bool]
 
-def check_dependencies():
-    """检查必需的依赖工具是否存在"""
-    # 检查 apt 命令
-    try:
-        subprocess.run(['apt', '--version'], capture_output=True, check=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        print("错误: 未找到 apt 命令，请确保在支持 apt 的系统上运行此工具", file=sys.stderr)
-        sys.exit(1)
+# 翻译统计结果缓存目录名（位于源码存储目录下）及最大缓存条目数
+STATS_CACHE_DIR_NAME = '.stats-cache'
+STATS_CACHE_MAX_ENTRIES = 256
+
+# deepin-translation-utils stats 输出中以 | 开头的表格行
+_TABLE_LINE_RE = re.compile(r'(?m)^\|[^\r\n]*')
+
+# 固定的命令前缀
+APT_SOURCE = ('apt', 'source')
+DTU_STATS = ('deepin-translation-utils', 'stats')
+
+# 未找到 apt 命令时的提示信息
+APT_NOT_FOUND_MESSAGE = "未找到 apt 命令，请确保在支持 apt 的系统上运行此工具"
+
+
+def decode_output(data: bytes) -> str:
+    """
+    解码子进程输出
 
+    与 subprocess 的 text=True 一致，将 \r\n 和单独的 \r 统一转换为 \n。
+    """
+    return data.decode('utf-8', errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def check_dependencies() -> str:
+    """
+    检查必需的依赖工具是否存在
+
+    apt 命令不在此处预先检查，而是在首次实际调用 apt source 时检测。
+
+    Returns:
+        deepin-translation-utils -V 的完整输出，包含构建后缀，如
+        "deepin-translation-utils 0.4.0-0-g08b7ee6"
+    """
     # 检查 deepin-translation-utils 命令及版本
     try:
-        result = subprocess.run(['deepin-translation-utils', '-V'], capture_output=True, text=True, check=True)
-        version_output = result.stdout.strip()
+        result = subprocess.run(['deepin-translation-utils', '-V'], capture_output=True, check=True)
+        version_output = decode_output(result.stdout).strip()
 
         # 解析版本号，格式如 "deepin-translation-utils 0.4.0-0-g08b7ee6"
-        match = re.search(r'deepin-translation-utils (\d+)\.(\d+)\.(\d+)', version_output)
-        if not match:
+        try:
+            parts = version_output.split()
+            if parts[0] != 'deepin-translation-utils':
+                raise ValueError(version_output)
+            major, minor, patch = map(int, parts[1].split('-', 1)[0].split('.'))
+        except (ValueError, IndexError):
             print("错误: 无法解析 deepin-translation-utils 版本号", file=sys.stderr)
             sys.exit(1)
 
-        major, minor, patch = map(int, match.groups())
         version = (major, minor, patch)
 
         # 检查版本是否 >= 0.4.0
@@ -43,6 +77,8 @@ def check_dependencies():
             print(f"错误: deepin-translation-utils 版本过低 ({major}.{minor}.{patch})，需要 >= 0.4.0", file=sys.stderr)
             sys.exit(1)
 
+        return version_output
+
     except (subprocess.CalledProcessError, FileNotFoundError):
         print("错误: 未找到 deepin-translation-utils 命令，请先安装此工具", file=sys.stderr)
         sys.exit(1)
@@ -51,8 +87,10 @@ def check_dependencies():
 def read_package_list(file_path: str) -> List[str]:
     """读取包名列表文件"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            packages = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        # 一次性读入整个文件，在字节层面切分和过滤，只解码保留下来的行
+        data = Path(file_path).read_bytes()
+        packages = [line.decode('utf-8') for line in (raw.strip() for raw in data.split(b'\n'))
+                    if line and not line.startswith(b'#')]
         return packages
     except FileNotFoundError:
         print(f"错误: 文件 {file_path} 不存在", file=sys.stderr)
@@ -62,46 +100,109 @@ def read_package_list(file_path: str) -> List[str]:
         sys.exit(1)
 
 
-def download_source_package(package_name: str, source_dir: Path) -> Tuple[bool, str]:
+def scan_source_dir(source_dir: Path, packages: List[str]) -> Dict[str, List[SourceEntry]]:
+    """扫描一次源码存储目录，按包名前缀归类其中的条目"""
+    # is_dir() 使用 scandir 已获取的目录项类型，无需额外 stat
+    with os.scandir(source_dir) as it:
+        entries = sorted((entry.name, entry.path, entry.is_dir()) for entry in it)
+    names = [entry[0] for entry in entries]
+
+    # 条目按名称排序后，以某包名开头的条目是连续的一段，二分查找其起点即可
+    by_prefix = {}
+    for package_name in packages:
+        matches = []
+        for i in range(bisect.bisect_left(names, package_name), len(names)):
+            if not names[i].startswith(package_name):
+                break
+            matches.append(entries[i])
+        by_prefix[package_name] = matches
+    return by_prefix
+
+
+def _first_source_directory(entries: List[SourceEntry]) -> str:
+    """返回条目中第一个目录的路径，没有目录时返回空字符串"""
+    for _, path, is_dir in entries:
+        if is_dir:
+            return path
+    return ""
+
+
+async def download_source_package(package_name: str, source_dir: Path,
+                                  entries: List[SourceEntry],
+                                  download_lock: asyncio.Lock) -> Tuple[bool, str, str]:
     """
     下载软件包源码
 
+    同一源码包的多个二进制包（如 foo 与 foo-data）会下载并解压到同一目录，
+    因此各包的 apt source 调用通过 download_lock 逐个执行。
+
+    Args:
+        package_name: 包名
+        source_dir: 源码存储目录
+        entries: 源码存储目录中以包名开头的条目
+        download_lock: 串行化 apt source 调用的锁
+
     Returns:
-        (success: bool, message: str)
+        (success: bool, message: str, source_path: str)，
+        source_path 为源码目录路径，未找到时为空字符串
     """
     # 检查源码是否已存在
-    existing_dirs = list(source_dir.glob(f"{package_name}*"))
-    if existing_dirs:
-        return True, f"源码已存在，跳过下载: {existing_dirs[0]}"
+    if entries:
+        return True, f"源码已存在，跳过下载: {entries[0][1]}", _first_source_directory(entries)
 
     # 下载源码
+    async with download_lock:
+        try:
+            # 只有失败时的 stderr 会被用到，stdout 直接丢弃
+            proc = await asyncio.create_subprocess_exec(
+                *APT_SOURCE, package_name,
+                cwd=source_dir,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+            _, err = await proc.communicate()
+            if proc.returncode != 0:
+                return False, f"apt source 失败: {decode_output(err).strip()}", ""
+        except FileNotFoundError:
+            return False, f"错误: {APT_NOT_FOUND_MESSAGE}", ""
+        except Exception as e:
+            return False, f"下载异常: {str(e)}", ""
+
+    # 下载前不存在任何匹配条目，重新扫描一次得到的即为新下载的条目；
+    # 只收集以本包名开头的条目，无需对整个目录排序
+    with os.scandir(source_dir) as it:
+        new_entries = sorted((entry.name, entry.path, entry.is_dir()) for entry in it
+                             if entry.name.startswith(package_name))
+    return True, "下载成功", _first_source_directory(new_entries)
+
+
+def bulk_download_sources(packages: List[str], source_dir: Path) -> None:
+    """
+    通过一次 apt source 调用批量下载给定软件包的源码
+
+    批量下载失败时（如其中某个包不存在），由 process_package 中的
+    download_source_package 逐个重试，因此这里不返回结果，调用方总是
+    重新扫描源码目录。未找到 apt 命令时直接退出。
+    """
     try:
-        result = subprocess.run(
-            ['apt', 'source', package_name],
+        subprocess.run(
+            [*APT_SOURCE, *packages],
             cwd=source_dir,
-            capture_output=True,
-            text=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
             check=True
         )
-        return True, "下载成功"
-    except subprocess.CalledProcessError as e:
-        return False, f"apt source 失败: {e.stderr.strip()}"
-    except Exception as e:
-        return False, f"下载异常: {str(e)}"
-
+    except FileNotFoundError:
+        print(f"错误: {APT_NOT_FOUND_MESSAGE}", file=sys.stderr)
+        sys.exit(1)
+    except (subprocess.CalledProcessError, OSError):
+        # 失败时可能已下载部分包，由后续的重新扫描和逐个重试处理
+        pass
 
-def find_source_directory(package_name: str, source_dir: Path) -> Tuple[str, str]:
-    """查找软件包的源码目录，并从目录名解析版本号"""
-    # 查找以包名开头的目录
-    matching_dirs = [path for path in source_dir.glob(f"{package_name}*") if path.is_dir()]
-    if not matching_dirs:
-        return "", "未知版本"
 
-    # 选择第一个匹配的目录
-    source_dir_path = str(matching_dirs[0])
-    
-    # 从目录名解析版本号
-    dir_name = matching_dirs[0].name
+def parse_source_version(package_name: str, source_path: str) -> str:
+    """从软件包源码目录名解析版本号"""
+    dir_name = os.path.basename(source_path)
     
     # 通常格式为 package-name-version
     if '-' in dir_name:
@@ -115,9 +216,9 @@ def find_source_directory(package_name: str, source_dir: Path) -> Tuple[str, str
                     # 移除包名部分，只保留版本号
                     version_only = potential_version[:-len(package_name)].rstrip('-')
                     if version_only:
-                        return source_dir_path, version_only
+                        return version_only
                 else:
-                    return source_dir_path, potential_version
+                    return potential_version
     
     # 如果无法从目录名推断版本，尝试其他方法
     # 有些包的目录名可能是 package_name.orig 或其他格式
@@ -125,34 +226,134 @@ def find_source_directory(package_name: str, source_dir: Path) -> Tuple[str, str
         # 移除包名部分，看剩余部分是否包含版本信息
         remaining = dir_name.replace(package_name, '', 1).lstrip('-_.')
         if remaining and re.search(r'\d+', remaining):
-            return source_dir_path, remaining
+            return remaining
     
-    return source_dir_path, "未知版本"
+    return "未知版本"
+
+
+def _cache_key(source_path: str, language_arg: str, tool_version: str) -> str:
+    """根据源码路径、源码树中所有目录和文件的修改时间、语言列表及工具版本计算缓存键"""
+    digest = hashlib.blake2b(digest_size=16)
+    # 路径和参数可能包含 surrogateescape 转义的非 UTF-8 字节，按文件系统编码还原
+    digest.update(os.fsencode(os.path.abspath(source_path)))
+    digest.update(language_arg.encode('utf-8', errors='surrogateescape'))
+    digest.update(tool_version.encode('utf-8', errors='surrogateescape'))
+
+    # 任意文件被修改、添加或删除都会改变对应文件或其所在目录的修改时间
+    for dirpath, dirnames, filenames in os.walk(source_path):
+        dirnames.sort()
+        for name in [''] + sorted(filenames):
+            path = os.path.join(dirpath, name) if name else dirpath
+            try:
+                st = os.lstat(path)
+            except FileNotFoundError:
+                continue
+            digest.update(os.fsencode(os.path.relpath(path, source_path)))
+            digest.update(f"\0{st.st_mtime_ns}\0{st.st_size}\n".encode('ascii'))
+    return digest.hexdigest()
+
+
+def _read_stats_cache(cache_file: Path) -> Optional[str]:
+    """读取缓存的统计结果，未命中或缓存条目损坏时返回 None"""
+    try:
+        content = cache_file.read_text(encoding='utf-8')
+    except OSError:
+        return None
+    except ValueError:
+        # 缓存条目不是合法的 UTF-8，视为未命中并删除，之后会重新生成
+        try:
+            os.remove(cache_file)
+        except OSError:
+            pass
+        return None
+    # 更新修改时间，供 LRU 淘汰使用
+    try:
+        os.utime(cache_file)
+    except OSError:
+        pass
+    return content
 
 
-def get_translation_stats(source_path: str, languages: List[str]) -> Tuple[bool, str]:
+def _write_stats_cache(cache_file: Path, content: str) -> None:
+    """写入统计结果缓存"""
+    try:
+        cache_file.parent.mkdir(exist_ok=True)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        tmp_file.write_text(content, encoding='utf-8')
+        os.replace(tmp_file, cache_file)
+    except Exception:
+        # 缓存写入失败不影响统计结果
+        pass
+
+
+def prune_stats_cache(cache_dir: Path) -> None:
+    """按修改时间淘汰超出上限的旧缓存条目，在所有包处理完成后调用一次"""
+    try:
+        with os.scandir(cache_dir) as it:
+            cached = [(entry.stat().st_mtime_ns, entry.path) for entry in it
+                      if entry.name.endswith('.txt')]
+    except OSError:
+        return
+    if len(cached) <= STATS_CACHE_MAX_ENTRIES:
+        return
+
+    cached.sort()
+    for _, path in cached[:len(cached) - STATS_CACHE_MAX_ENTRIES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+async def get_translation_stats(source_path: str, languages: List[str],
+                                cache_dir: Optional[Path] = None,
+                                tool_version: str = '') -> Tuple[bool, str]:
     """
     获取翻译统计信息
 
     Args:
         source_path: 源码路径
         languages: 要统计的语言列表
+        cache_dir: 统计结果缓存目录，为 None 时不使用缓存
+        tool_version: deepin-translation-utils -V 的完整输出，作为缓存键的一部分
 
     Returns:
         (success: bool, output_or_error: str)
     """
+    language_arg = ','.join(languages)
+    cache_file = None
+    cached = None
+    if cache_dir is not None:
+        # 缓存只是优化，计算缓存键或读取缓存时的任何异常都退化为不使用缓存
+        try:
+            # 遍历源码树计算缓存键较耗时，放到线程中执行以免阻塞其他包
+            cache_key = await asyncio.to_thread(_cache_key, source_path, language_arg, tool_version)
+            cache_file = cache_dir / f"{cache_key}.txt"
+            cached = _read_stats_cache(cache_file)
+        except Exception:
+            cache_file = None
+            cached = None
+    if cached is not None:
+        return True, cached
+
     try:
         # 构建命令，使用 -l 参数指定语言列表
-        cmd = ['deepin-translation-utils', 'stats', source_path, '-l', ','.join(languages)]
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True
+        cmd = [*DTU_STATS, source_path, '-l', language_arg]
+        # 读取原始字节，仅在结束后解码一次
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
         )
-        return True, result.stdout
-    except subprocess.CalledProcessError as e:
-        return False, f"deepin-translation-utils 执行失败 (返回码: {e.returncode}): {e.stderr.strip()}"
+        out, err = await proc.communicate()
+        if proc.returncode != 0:
+            stderr = decode_output(err).strip()
+            return False, f"deepin-translation-utils 执行失败 (返回码: {proc.returncode}): {stderr}"
+
+        output = decode_output(out)
+        if cache_file is not None:
+            _write_stats_cache(cache_file, output)
+        return True, output
     except Exception as e:
         return False, f"执行异常: {str(e)}"
 
@@ -161,50 +362,89 @@ def filter_translation_lines(output: str, languages: List[str]) -> str:
     """过滤包含指定语言的行（现在deepin-translation-utils已通过-l参数预过滤）"""
     # 由于deepin-translation-utils 0.4.0+已通过-l参数过滤语言，
     # 这里主要是去除非表格部分，保持输出整洁
-    lines = output.split('\n')
-    filtered_lines = [line for line in lines if line.startswith('|')]
-    return '\n'.join(filtered_lines)
+    return '\n'.join(_TABLE_LINE_RE.findall(output))
 
 
-def process_package(package_name: str, source_dir: Path, languages: List[str]) -> None:
-    """处理单个软件包"""
+async def process_package(package_name: str, source_dir: Path, languages: List[str],
+                          entries: List[SourceEntry],
+                          semaphore: asyncio.Semaphore, download_lock: asyncio.Lock,
+                          tool_version: str, use_cache: bool = True) -> str:
+    """
+    处理单个软件包
+
+    所有输出先写入内存缓冲区，由调用方一次性写到标准输出。
+
+    Args:
+        package_name: 包名
+        source_dir: 源码存储目录
+        languages: 要统计的语言列表
+        entries: 源码存储目录中以包名开头的条目
+        semaphore: 限制同时进行翻译统计的包数量
+        download_lock: 串行化 apt source 调用的锁
+        tool_version: deepin-translation-utils -V 的完整输出
+        use_cache: 是否使用翻译统计结果缓存
+
+    Returns:
+        该包的完整输出文本
+    """
+    out = io.StringIO()
+
     # 下载源码
-    success, message = download_source_package(package_name, source_dir)
+    success, message, source_path = await download_source_package(package_name, source_dir,
+                                                                  entries, download_lock)
     if not success:
-        print(f"## {package_name} (未知版本):")
-        print()
-        print(message)
-        print()
-        return
+        out.write(f"## {package_name} (未知版本):\n\n{message}\n\n")
+        return out.getvalue()
 
-    # 查找源码目录并获取版本信息
-    source_path, version = find_source_directory(package_name, source_dir)
     if not source_path:
-        print(f"## {package_name} (未知版本):")
-        print()
-        print(f"错误: 未找到包 {package_name} 的源码目录")
-        print()
-        return
-    
+        out.write(f"## {package_name} (未知版本):\n\n错误: 未找到包 {package_name} 的源码目录\n\n")
+        return out.getvalue()
+
+    # 从源码目录名获取版本信息
+    version = parse_source_version(package_name, source_path)
+
     # 显示包名和从源码解析的版本
-    print(f"## {package_name} ({version}):")
-    print()
+    out.write(f"## {package_name} ({version}):\n\n")
 
     # 获取翻译统计
-    success, output = get_translation_stats(source_path, languages)
+    cache_dir = source_dir / STATS_CACHE_DIR_NAME if use_cache else None
+    async with semaphore:
+        success, output = await get_translation_stats(source_path, languages, cache_dir, tool_version)
     if not success:
-        print(output)
-        print()
-        return
+        out.write(f"{output}\n\n")
+        return out.getvalue()
 
     # 过滤并输出结果
     filtered_output = filter_translation_lines(output, languages)
     if filtered_output.strip():
-        print(filtered_output)
+        out.write(f"{filtered_output}\n\n")
     else:
         lang_list = ', '.join(languages)
-        print(f"未找到包含 {lang_list} 的翻译统计信息")
-    print()
+        out.write(f"未找到包含 {lang_list} 的翻译统计信息\n\n")
+    return out.getvalue()
+
+
+async def process_packages(packages: List[str], source_dir: Path, languages: List[str],
+                           by_prefix: Dict[str, List[SourceEntry]], jobs: int,
+                           tool_version: str, use_cache: bool) -> None:
+    """
+    并发处理所有软件包
+
+    源码下载逐个进行，翻译统计最多同时进行 jobs 个；按包名列表的顺序输出结果
+    以保持输出稳定，每个包的输出只写入并刷新一次。
+    """
+    semaphore = asyncio.Semaphore(jobs)
+    download_lock = asyncio.Lock()
+    tasks = [
+        asyncio.create_task(process_package(package_name, source_dir, languages,
+                                            by_prefix[package_name], semaphore, download_lock,
+                                            tool_version, use_cache))
+        for package_name in packages
+    ]
+    for task in tasks:
+        text = await task
+        sys.stdout.write(text)
+        sys.stdout.flush()
 
 
 def main():
@@ -215,11 +455,15 @@ def main():
                        help='源码存储目录 (默认: pkg-sources)')
     parser.add_argument('--languages', default='zh_CN,zh_HK,zh_TW',
                        help='要统计的语言列表，用逗号分隔 (默认: zh_CN,zh_HK,zh_TW)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                       help='同时进行翻译统计的包数量 (默认: min(8, 包数量))')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='不使用也不写入翻译统计结果缓存')
 
     args = parser.parse_args()
 
     # 检查依赖
-    check_dependencies()
+    tool_version = check_dependencies()
 
     # 解析语言列表
     languages = [lang.strip() for lang in args.languages.split(',') if lang.strip()]
@@ -237,9 +481,23 @@ def main():
     source_dir = Path(args.source_dir)
     source_dir.mkdir(exist_ok=True)
 
-    # 处理每个包
-    for package_name in packages:
-        process_package(package_name, source_dir, languages)
+    jobs = args.jobs if args.jobs is not None else min(8, len(packages))
+    if jobs < 1:
+        print("错误: --jobs 必须为正整数", file=sys.stderr)
+        sys.exit(1)
+
+    # 批量下载缺失的源码，失败的包会在逐个处理时重试
+    by_prefix = scan_source_dir(source_dir, packages)
+    missing = [package_name for package_name in packages if not by_prefix[package_name]]
+    if missing:
+        bulk_download_sources(missing, source_dir)
+        by_prefix = scan_source_dir(source_dir, packages)
+
+    asyncio.run(process_packages(packages, source_dir, languages,
+                                 by_prefix, jobs, tool_version, not args.no_cache))
+
+    if not args.no_cache:
+        prune_stats_cache(source_dir / STATS_CACHE_DIR_NAME)
 
 
 if __name__ == "__main__":